@@ -7,273 +7,634 @@ import os
 import sys
 import stat
 import fnmatch
+import re
 import argparse
+import functools
+import itertools
 import pwd
 import grp
 import time
+import math
+import queue
+import threading
 from datetime import datetime, timedelta
 
 VERSION = "pyfind 1.0"
 
+# os.fwalk and dir_fd-relative unlink/rmdir are only available on POSIX
+HAVE_FWALK = (hasattr(os, 'fwalk') and os.unlink in os.supports_dir_fd
+              and os.rmdir in os.supports_dir_fd)
+
 # --- Utility functions ---
+SIZE_UNITS = {'b': 1, 'c': 1, 'w': 2, 'k': 1024, 'M': 1024**2, 'G': 1024**3}
+
 def parse_size(size_str):
     """Parse a size string like 10k, 2M, 3G, etc."""
-    units = {'b': 1, 'c': 1, 'w': 2, 'k': 1024, 'M': 1024**2, 'G': 1024**3}
-    if size_str[-1] in units:
-        return int(size_str[:-1]) * units[size_str[-1]]
+    unit = SIZE_UNITS.get(size_str[-1:])
+    if unit is not None:
+        return int(size_str[:-1]) * unit
     return int(size_str)
 
-def match_pattern(name, pattern, case_sensitive=True):
-    if not case_sensitive:
-        name = name.lower()
-        pattern = pattern.lower()
-    return fnmatch.fnmatch(name, pattern)
+def compile_pattern(pattern, case_sensitive=True):
+    """Compile a shell glob pattern to a regex once, for matching many names."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(fnmatch.translate(pattern), flags)
+
+@functools.lru_cache(maxsize=1024)
+def lookup_uid(user):
+    """Resolve a user name or numeric id to a uid."""
+    return int(user) if user.isdigit() else pwd.getpwnam(user).pw_uid
 
-def n_compare(val, nstr):
-    """Compare val to nstr, which can be +N, -N, or N."""
+@functools.lru_cache(maxsize=1024)
+def lookup_gid(group):
+    """Resolve a group name or numeric id to a gid."""
+    return int(group) if group.isdigit() else grp.getgrnam(group).gr_gid
+
+def parse_n(nstr, convert=int):
+    """Parse +N, -N, or N once into bounds (lo, hi): an integer val matches iff lo < val <= hi."""
     if nstr.startswith('+'):
-        return val > int(nstr[1:])
-    elif nstr.startswith('-'):
-        return val < int(nstr[1:])
-    else:
-        return val == int(nstr)
+        return convert(nstr[1:]), math.inf
+    if nstr.startswith('-'):
+        return -math.inf, convert(nstr[1:]) - 1
+    n = convert(nstr)
+    return n - 1, n
 
 # --- Expression evaluation ---
+def bind(consts, value):
+    """Store value in consts under a fresh name for generated code; return the name."""
+    key = f'_c{len(consts)}'
+    consts[key] = value
+    return key
+
 class Expr:
-    def __call__(self, path, st):
-        return True
+    # Relative cost of evaluating the test; used to order conjunctions
+    cost = 0
+    # Whether the test reads the stat result; if nothing does, walk skips lstat
+    needs_stat = False
+    def source(self, consts):
+        """Return this test as a Python expression over path, name and st.
+
+        Values the expression needs are stored in consts via bind().
+        """
+        return 'True'
+    def compile(self):
+        """Return a function (path, name, st) -> bool for this test.
+
+        The whole tree is generated as one straight-line boolean expression
+        and compiled once, so evaluating an entry makes no per-node calls
+        beyond the regex matches themselves.
+        """
+        consts = {}
+        body = self.source(consts)
+        exec(f'def match(path, name, st):\n    return {body}\n', consts)
+        return consts['match']
 
-class And(Expr):
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
-    def __call__(self, path, st):
-        return self.left(path, st) and self.right(path, st)
+class All(Expr):
+    """Flat conjunction of any number of tests, evaluated left to right."""
+    def __init__(self, exprs):
+        self.exprs = tuple(exprs)
+        self.cost = max(expr.cost for expr in self.exprs)
+        self.needs_stat = any(expr.needs_stat for expr in self.exprs)
+    def source(self, consts):
+        return '(' + ' and '.join(expr.source(consts) for expr in self.exprs) + ')'
 
-class Or(Expr):
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
-    def __call__(self, path, st):
-        return self.left(path, st) or self.right(path, st)
+class Any(Expr):
+    """Flat disjunction of any number of tests, evaluated left to right."""
+    def __init__(self, exprs):
+        self.exprs = tuple(exprs)
+        self.cost = max(expr.cost for expr in self.exprs)
+        self.needs_stat = any(expr.needs_stat for expr in self.exprs)
+    def source(self, consts):
+        return '(' + ' or '.join(expr.source(consts) for expr in self.exprs) + ')'
 
 class Not(Expr):
     def __init__(self, expr):
         self.expr = expr
-    def __call__(self, path, st):
-        return not self.expr(path, st)
+        self.cost = expr.cost
+        self.needs_stat = expr.needs_stat
+    def source(self, consts):
+        return f'(not {self.expr.source(consts)})'
 
 class Name(Expr):
     def __init__(self, pattern):
         self.pattern = pattern
-    def __call__(self, path, st):
-        return match_pattern(os.path.basename(path), self.pattern)
+        self._re = compile_pattern(pattern)
+    def source(self, consts):
+        return f'({bind(consts, self._re.match)}(name) is not None)'
 
 class Iname(Expr):
     def __init__(self, pattern):
         self.pattern = pattern
-    def __call__(self, path, st):
-        return match_pattern(os.path.basename(path), self.pattern, case_sensitive=False)
+        self._re = compile_pattern(pattern, case_sensitive=False)
+    def source(self, consts):
+        return f'({bind(consts, self._re.match)}(name) is not None)'
+
+# File type bits for each -type letter
+TYPE_BITS = {
+    'f': stat.S_IFREG, 'd': stat.S_IFDIR, 'l': stat.S_IFLNK, 'b': stat.S_IFBLK,
+    'c': stat.S_IFCHR, 'p': stat.S_IFIFO, 's': stat.S_IFSOCK,
+}
 
 class Type(Expr):
+    cost = 1
+    needs_stat = True
     def __init__(self, t):
         self.t = t
-    def __call__(self, path, st):
-        t = self.t
-        if t == 'f':
-            return stat.S_ISREG(st.st_mode)
-        elif t == 'd':
-            return stat.S_ISDIR(st.st_mode)
-        elif t == 'l':
-            return stat.S_ISLNK(st.st_mode)
-        elif t == 'b':
-            return stat.S_ISBLK(st.st_mode)
-        elif t == 'c':
-            return stat.S_ISCHR(st.st_mode)
-        elif t == 'p':
-            return stat.S_ISFIFO(st.st_mode)
-        elif t == 's':
-            return stat.S_ISSOCK(st.st_mode)
-        return False
+        # Unknown letters never match: no masked mode equals None
+        self.bits = TYPE_BITS.get(t)
+    def source(self, consts):
+        # Mask the file type bits inline; stat.S_IFMT() would cost a call
+        return f'((st.st_mode & 0o170000) == {bind(consts, self.bits)})'
 
 class User(Expr):
+    cost = 2
+    needs_stat = True
     def __init__(self, user):
-        self.uid = int(user) if user.isdigit() else pwd.getpwnam(user).pw_uid
-    def __call__(self, path, st):
-        return st.st_uid == self.uid
+        self.uid = lookup_uid(user)
+    def source(self, consts):
+        return f'(st.st_uid == {bind(consts, self.uid)})'
+
+class UserSet(Expr):
+    """Several -user tests joined by -o, as one set membership test."""
+    cost = 2
+    needs_stat = True
+    def __init__(self, uids):
+        self.uids = frozenset(uids)
+    def source(self, consts):
+        return f'(st.st_uid in {bind(consts, self.uids)})'
 
 class Group(Expr):
+    cost = 2
+    needs_stat = True
     def __init__(self, group):
-        self.gid = int(group) if group.isdigit() else grp.getgrnam(group).gr_gid
-    def __call__(self, path, st):
-        return st.st_gid == self.gid
+        self.gid = lookup_gid(group)
+    def source(self, consts):
+        return f'(st.st_gid == {bind(consts, self.gid)})'
+
+class GroupSet(Expr):
+    """Several -group tests joined by -o, as one set membership test."""
+    cost = 2
+    needs_stat = True
+    def __init__(self, gids):
+        self.gids = frozenset(gids)
+    def source(self, consts):
+        return f'(st.st_gid in {bind(consts, self.gids)})'
 
 class Size(Expr):
+    cost = 2
+    needs_stat = True
     def __init__(self, size):
         self.size = size
-    def __call__(self, path, st):
+        self.lo, self.hi = parse_n(size, parse_size)
+    def source(self, consts):
         # st_size in bytes
-        return n_compare(st.st_size, self.size)
+        return f'({bind(consts, self.lo)} < st.st_size <= {bind(consts, self.hi)})'
 
-class Mtime(Expr):
+class AgeTest(Expr):
+    """Base for -mtime/-atime/-ctime: age in whole days, measured from startup."""
+    cost = 3
+    needs_stat = True
     def __init__(self, n):
         self.n = n
-    def __call__(self, path, st):
-        days = int(self.n.lstrip('+-'))
+        lo, hi = parse_n(n)
         now = time.time()
-        mtime = st.st_mtime
-        age_days = int((now - mtime) // 86400)
-        return n_compare(age_days, self.n)
+        # Age in whole days in (lo, hi] is a timestamp window, so the tests
+        # compare raw st_*time values with no per-entry arithmetic
+        self.lo = now - (hi + 1) * 86400
+        self.hi = now - (lo + 1) * 86400
+    def source(self, consts):
+        return f'({bind(consts, self.lo)} < st.{self.field} <= {bind(consts, self.hi)})'
 
-class Atime(Expr):
-    def __init__(self, n):
-        self.n = n
-    def __call__(self, path, st):
-        days = int(self.n.lstrip('+-'))
-        now = time.time()
-        atime = st.st_atime
-        age_days = int((now - atime) // 86400)
-        return n_compare(age_days, self.n)
+class Mtime(AgeTest):
+    field = 'st_mtime'
 
-class Ctime(Expr):
-    def __init__(self, n):
-        self.n = n
-    def __call__(self, path, st):
-        days = int(self.n.lstrip('+-'))
-        now = time.time()
-        ctime = st.st_ctime
-        age_days = int((now - ctime) // 86400)
-        return n_compare(age_days, self.n)
+class Atime(AgeTest):
+    field = 'st_atime'
+
+class Ctime(AgeTest):
+    field = 'st_ctime'
 
 class TrueExpr(Expr):
-    def __call__(self, path, st):
-        return True
+    pass
 
 class FalseExpr(Expr):
-    def __call__(self, path, st):
-        return False
+    def source(self, consts):
+        return 'False'
 
 # --- Actions ---
+class OutputBuffer:
+    """Collect output records and write them to a file descriptor in chunks."""
+    def __init__(self, fd, limit=4096):
+        self.fd = fd
+        self.limit = limit
+        self.records = []
+    def write(self, path, end):
+        self.records.append(os.fsencode(path) + end)
+        if len(self.records) >= self.limit:
+            self.flush()
+    def flush(self):
+        data = memoryview(b''.join(self.records))
+        self.records.clear()
+        while data:
+            data = data[os.write(self.fd, data):]
+    def __enter__(self):
+        sys.stdout.flush()
+        return self
+    def __exit__(self, *exc_info):
+        self.flush()
+
+STDOUT = OutputBuffer(1)
+
 def action_print(path, st):
-    print(path)
+    STDOUT.write(path, b'\n')
     return True
 
 def action_print0(path, st):
-    print(path, end='\0')
+    STDOUT.write(path, b'\0')
     return True
 
-def action_delete(path, st):
+def action_delete(path, st, dir_fd=None, name=None):
+    # With a dir_fd, unlink relative to the open parent instead of re-resolving path
+    target = path if dir_fd is None else name
     try:
         if stat.S_ISDIR(st.st_mode):
-            os.rmdir(path)
+            os.rmdir(target, dir_fd=dir_fd)
         else:
-            os.remove(path)
+            os.unlink(target, dir_fd=dir_fd)
         return True
-    except Exception as e:
-        print(f"delete failed: {e}", file=sys.stderr)
+    except OSError as e:
+        # With a dir_fd the error only names the entry, so report the full path
+        print(f"delete failed: {path}: {e.strerror}", file=sys.stderr)
         return False
 
 # --- Expression parser ---
+TESTS = {
+    '-name': Name, '-iname': Iname, '-type': Type, '-user': User,
+    '-group': Group, '-size': Size, '-mtime': Mtime, '-atime': Atime,
+    '-ctime': Ctime,
+}
+# Options handled by main(); the parser only has to step over their argument
+OPTIONS_WITH_ARG = ('-mindepth', '-maxdepth', '--threads')
+
+def make_all(exprs):
+    """Build a conjunction, folding nested All and constant operands."""
+    parts = []
+    for expr in exprs:
+        if isinstance(expr, FalseExpr):
+            return FalseExpr()
+        if isinstance(expr, All):
+            parts.extend(expr.exprs)
+        elif not isinstance(expr, TrueExpr):
+            parts.append(expr)
+    if not parts:
+        return TrueExpr()
+    return parts[0] if len(parts) == 1 else All(parts)
+
+def make_any(exprs):
+    """Build a disjunction, folding nested Any and constant operands."""
+    parts = []
+    for expr in exprs:
+        if isinstance(expr, TrueExpr):
+            return TrueExpr()
+        if isinstance(expr, Any):
+            parts.extend(expr.exprs)
+        elif not isinstance(expr, FalseExpr):
+            parts.append(expr)
+    if not parts:
+        return FalseExpr()
+    return parts[0] if len(parts) == 1 else Any(parts)
+
+def make_not(expr):
+    """Negate expr, folding double negation and constants."""
+    if isinstance(expr, Not):
+        return expr.expr
+    if isinstance(expr, TrueExpr):
+        return FalseExpr()
+    if isinstance(expr, FalseExpr):
+        return TrueExpr()
+    return Not(expr)
+
+def parse_or(args, i):
+    """EXPR1 -o EXPR2 ...; returns (expr, next index)."""
+    expr, i = parse_and(args, i)
+    exprs = [expr]
+    while i < len(args) and args[i] in ('-o', '-or'):
+        expr, i = parse_and(args, i + 1)
+        exprs.append(expr)
+    return make_any(exprs), i
+
+def parse_and(args, i):
+    """EXPR1 [-a] EXPR2 ...; stops at -o or a closing parenthesis."""
+    exprs = []
+    while i < len(args) and args[i] not in ('-o', '-or', ')'):
+        if args[i] in ('-a', '-and'):
+            i += 1
+            continue
+        expr, i = parse_not(args, i)
+        exprs.append(expr)
+    return make_all(exprs), i
+
+def parse_not(args, i):
+    """Any number of ! / -not prefixes followed by a primary."""
+    negate = False
+    while i < len(args) and args[i] in ('!', '-not'):
+        negate = not negate
+        i += 1
+    expr, i = parse_primary(args, i)
+    return (make_not(expr) if negate else expr), i
+
+def parse_primary(args, i):
+    """A test, a parenthesized expression, or an always-true action/option."""
+    if i >= len(args):
+        return TrueExpr(), i
+    arg = args[i]
+    if arg == '(':
+        expr, i = parse_or(args, i + 1)
+        if i < len(args) and args[i] == ')':
+            i += 1
+        return expr, i
+    if arg in TESTS:
+        return TESTS[arg](args[i+1]), i + 2
+    if arg == '-true':
+        return TrueExpr(), i + 1
+    if arg == '-false':
+        return FalseExpr(), i + 1
+    if arg in OPTIONS_WITH_ARG:
+        return TrueExpr(), i + 2
+    if arg == '--help':
+        print_help()
+        sys.exit(0)
+    if arg == '--version':
+        print(VERSION)
+        sys.exit(0)
+    # Actions (chosen by main) and unknown args are always true here
+    return TrueExpr(), i + 1
+
 def parse_expr(args):
-    """Parse a list of args into an expression tree and actions."""
-    # Only a subset of find's syntax is supported for brevity
-    expr = TrueExpr()
-    actions = [action_print]
+    """Parse a list of args into an expression tree.
+
+    Precedence follows find: ! binds tightest, then the implicit or explicit
+    -a, then -o; parentheses group. Constants and double negations are
+    folded while building, so the tree holds only tests that do real work.
+    """
+    exprs = []
     i = 0
     while i < len(args):
-        arg = args[i]
-        if arg == '-name':
-            expr = And(expr, Name(args[i+1]))
-            i += 2
-        elif arg == '-iname':
-            expr = And(expr, Iname(args[i+1]))
-            i += 2
-        elif arg == '-type':
-            expr = And(expr, Type(args[i+1]))
-            i += 2
-        elif arg == '-user':
-            expr = And(expr, User(args[i+1]))
-            i += 2
-        elif arg == '-group':
-            expr = And(expr, Group(args[i+1]))
-            i += 2
-        elif arg == '-size':
-            expr = And(expr, Size(args[i+1]))
-            i += 2
-        elif arg == '-mtime':
-            expr = And(expr, Mtime(args[i+1]))
-            i += 2
-        elif arg == '-atime':
-            expr = And(expr, Atime(args[i+1]))
-            i += 2
-        elif arg == '-ctime':
-            expr = And(expr, Ctime(args[i+1]))
-            i += 2
-        elif arg == '-print':
-            actions = [action_print]
-            i += 1
-        elif arg == '-print0':
-            actions = [action_print0]
+        if args[i] == ')':
+            # Unbalanced close paren, skip
             i += 1
-        elif arg == '-delete':
-            actions = [action_delete]
-            i += 1
-        elif arg == '-true':
-            expr = And(expr, TrueExpr())
-            i += 1
-        elif arg == '-false':
-            expr = And(expr, FalseExpr())
-            i += 1
-        elif arg == '!':
-            # Negate next expr
-            subexpr, skip = parse_expr(args[i+1:])
-            expr = And(expr, Not(subexpr))
-            i += skip + 1
-        elif arg == '-not':
-            subexpr, skip = parse_expr(args[i+1:])
-            expr = And(expr, Not(subexpr))
-            i += skip + 1
-        elif arg == '-and' or arg == '-a':
-            i += 1
-        elif arg == '-or' or arg == '-o':
-            subexpr, skip = parse_expr(args[i+1:])
-            expr = Or(expr, subexpr)
-            i += skip + 1
-        elif arg == '(':  # Not implemented: grouping
-            i += 1
-        elif arg == ')':
-            i += 1
-        elif arg == '--help':
-            print_help()
-            sys.exit(0)
-        elif arg == '--version':
-            print(VERSION)
-            sys.exit(0)
-        else:
-            # Unknown arg, skip
-            i += 1
-    return expr, i
+            continue
+        expr, i = parse_or(args, i)
+        exprs.append(expr)
+    return make_all(exprs), i
+
+def coalesce_ids(exprs, kind, attr, set_kind):
+    """Merge the kind operands of a disjunction into a single set_kind test."""
+    ids = [getattr(e, attr) for e in exprs if type(e) is kind]
+    if len(ids) < 2:
+        return exprs
+    merged = []
+    for e in exprs:
+        if type(e) is not kind:
+            merged.append(e)
+        elif ids is not None:
+            merged.append(set_kind(ids))
+            ids = None
+    return merged
+
+def reorder(expr):
+    """Sort the operands of every All node from cheapest to most expensive.
+
+    Tests have no side effects, so a conjunction may run them in any order;
+    cheap name matches then reject most entries before the stat-based tests
+    run. The sort is stable, so equal-cost tests keep their command-line order.
+    Within an Any, -user and -group alternatives become one set lookup each.
+    """
+    if isinstance(expr, Not):
+        return Not(reorder(expr.expr))
+    if isinstance(expr, All):
+        return All(sorted((reorder(e) for e in expr.exprs), key=lambda e: e.cost))
+    if isinstance(expr, Any):
+        exprs = [reorder(e) for e in expr.exprs]
+        exprs = coalesce_ids(exprs, User, 'uid', UserSet)
+        exprs = coalesce_ids(exprs, Group, 'gid', GroupSet)
+        return exprs[0] if len(exprs) == 1 else Any(exprs)
+    return expr
 
 def print_help():
-    print(f"""Usage: pyfind [path...] [expression]\n\nA minimal Python implementation of the Unix find tool.\n\nSupported tests: -name, -iname, -type, -user, -group, -size, -mtime, -atime, -ctime, -true, -false\nSupported actions: -print, -print0, -delete\nSupported operators: !, -not, -and, -a, -or, -o\nOther: --help, --version\n\nDefault path is the current directory; default action is -print.\n""")
+    print(f"""Usage: pyfind [-L] [-P] [path...] [expression]\n\nA minimal Python implementation of the Unix find tool.\n\nSupported tests: -name, -iname, -type, -user, -group, -size, -mtime, -atime, -ctime, -true, -false\nSupported actions: -print, -print0, -delete\nSupported operators: ( ), !, -not, -and, -a, -or, -o\nOther: -follow, -mindepth, -maxdepth, --threads N, --help, --version\n\nDefault path is the current directory; default action is -print.\n""")
 
 # --- Main walk logic ---
-def walk(paths, expr, actions, mindepth=0, maxdepth=None):
-    for top in paths:
-        for root, dirs, files in os.walk(top, topdown=True, followlinks=False):
-            rel_depth = root[len(top):].count(os.sep)
-            if mindepth and rel_depth < mindepth:
-                continue
-            if maxdepth is not None and rel_depth > maxdepth:
-                del dirs[:]
-                continue
-            for name in files + dirs:
+def scan_dir(root, follow=False):
+    """List root once, split into (dirs, files) DirEntry lists, or None on error."""
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return None
+    dirs = []
+    files = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=follow)
+        except OSError:
+            is_dir = False
+        if is_dir:
+            dirs.append(entry)
+        else:
+            files.append(entry)
+    return dirs, files
+
+def dir_key(path):
+    """(st_dev, st_ino) identifying the directory path resolves to."""
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+def loop_free(dirs, ancestors):
+    """Yield (entry, key) for the dirs that do not lead back to an ancestor.
+
+    Used with -L only. The key comes from the followed stat, which DirEntry
+    caches, so the tests reuse it for free. DirEntry.inode() is not enough:
+    for a symlink it is the inode of the link, not of its target.
+    """
+    for entry in dirs:
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key not in ancestors:
+            yield entry, key
+
+def scandir_walk(root, follow=False, maxdepth=None, depth=0, ancestors=None):
+    """Like os.walk(topdown=True), but yields (root, depth, dirs, files) with
+    DirEntry objects.
+
+    Each DirEntry caches the file type from readdir and its stat result, so
+    callers do not need a second lstat per entry. depth counts levels below
+    the starting root; directories deeper than maxdepth are never scanned.
+    Symlinks are followed only with follow set, and then a directory that is
+    one of its own ancestors is not entered again.
+    """
+    scanned = scan_dir(root, follow)
+    if scanned is None:
+        return
+    dirs, files = scanned
+    yield root, depth, dirs, files
+    if maxdepth is not None and depth >= maxdepth:
+        return
+    if not follow:
+        for entry in dirs:
+            yield from scandir_walk(entry.path, False, maxdepth, depth + 1)
+        return
+    if ancestors is None:
+        try:
+            ancestors = frozenset([dir_key(root)])
+        except OSError:
+            return
+    for entry, key in loop_free(dirs, ancestors):
+        yield from scandir_walk(entry.path, True, maxdepth, depth + 1, ancestors | {key})
+
+def parallel_walk(top, threads, maxdepth=None, needs_stat=True, follow=False):
+    """Like scandir_walk, but directories are scanned by a pool of threads.
+
+    Workers pop directories from a shared LIFO stack, list them (and stat
+    the entries when needs_stat is set; both release the GIL) and push
+    subdirectories back. Results come back through a bounded queue in
+    completion order, so output order is not deterministic.
+    """
+    lock = threading.Lock()
+    has_work = threading.Condition(lock)
+    ancestors = frozenset()
+    if follow:
+        try:
+            ancestors = frozenset([dir_key(top)])
+        except OSError:
+            return
+    paths = [(top, 0, ancestors)]
+    pending = [1]  # directories pushed but not yet scanned
+    output = queue.Queue(maxsize=threads * 4)
+
+    def worker():
+        while True:
+            with has_work:
+                while not paths and pending[0]:
+                    has_work.wait()
+                if not paths:
+                    return
+                root, depth, ancestors = paths.pop()
+            dirs, files = scan_dir(root, follow) or ([], [])
+            if needs_stat:
+                for entry in itertools.chain(files, dirs):
+                    try:
+                        entry.stat(follow_symlinks=follow)
+                    except OSError:
+                        pass
+            if dirs or files:
+                output.put((root, depth, dirs, files))
+            children = []
+            if maxdepth is None or depth < maxdepth:
+                if follow:
+                    children = [(entry.path, depth + 1, ancestors | {key})
+                                for entry, key in loop_free(dirs, ancestors)]
+                else:
+                    children = [(entry.path, depth + 1, ancestors) for entry in dirs]
+            with has_work:
+                paths.extend(children)
+                pending[0] += len(children) - 1
+                done = not pending[0]
+                if done:
+                    has_work.notify_all()
+                else:
+                    has_work.notify(len(children))
+            if done:
+                output.put(None)
+
+    for _ in range(threads):
+        threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = output.get()
+        if item is None:
+            return
+        yield item
+
+def fwalk_top(top):
+    """os.fwalk(top) without following links; yields nothing if top can't be opened.
+
+    os.fwalk stats and opens top before its first yield and lets that error
+    escape; errors below top are already skipped inside os.fwalk.
+    """
+    walker = os.fwalk(top, follow_symlinks=False)
+    try:
+        first = next(walker)
+    except (OSError, StopIteration):
+        return
+    yield first
+    yield from walker
+
+def fd_walk(top, match, actions, mindepth=0, maxdepth=None):
+    """walk() for a single top over os.fwalk, used for -delete.
+
+    Entries are stat'ed and deleted relative to the open parent directory, so
+    the kernel never re-resolves the full path and a directory renamed
+    mid-walk cannot redirect the delete elsewhere. match is the compiled
+    expression from Expr.compile().
+    """
+    # os.fwalk does not report depth; record each subdirectory's depth as its
+    # parent is visited, so depth matches scandir_walk whatever top looks like
+    depths = {top: 0}
+    for root, dirs, files, dir_fd in fwalk_top(top):
+        depth = depths.pop(root)
+        if depth >= mindepth:
+            for name in itertools.chain(files, dirs):
                 path = os.path.join(root, name)
                 try:
-                    st = os.lstat(path)
-                except Exception:
+                    st = os.stat(name, dir_fd=dir_fd, follow_symlinks=False)
+                except OSError:
                     continue
-                if expr(path, st):
+                if match(path, name, st):
+                    for action in actions:
+                        if action is action_delete:
+                            action(path, st, dir_fd, name)
+                        else:
+                            action(path, st)
+        if maxdepth is not None and depth >= maxdepth:
+            del dirs[:]
+        else:
+            for name in dirs:
+                depths[os.path.join(root, name)] = depth + 1
+
+def walk(paths, expr, actions, mindepth=0, maxdepth=None, threads=1, follow=False):
+    match = expr.compile()
+    if HAVE_FWALK and action_delete in actions and not follow:
+        for top in paths:
+            fd_walk(top, match, actions, mindepth, maxdepth)
+        return
+    # Name-only queries never look at st, so the per-entry lstat is skipped
+    needs_stat = expr.needs_stat or action_delete in actions
+    for top in paths:
+        if threads > 1:
+            tree = parallel_walk(top, threads, maxdepth, needs_stat, follow)
+        else:
+            tree = scandir_walk(top, follow, maxdepth)
+        for root, depth, dirs, files in tree:
+            if depth < mindepth:
+                continue
+            for entry in itertools.chain(files, dirs):
+                path = entry.path
+                st = None
+                if needs_stat:
+                    try:
+                        st = entry.stat(follow_symlinks=follow)
+                    except OSError:
+                        # Under -L a dangling symlink is tested as the link itself
+                        if not follow:
+                            continue
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                if match(path, entry.name, st):
                     for action in actions:
                         action(path, st)
 
@@ -283,8 +644,14 @@ def main():
     # Parse paths
     paths = []
     i = 0
+    # -H/-L/-P come before the paths; the last one wins
+    follow = False
+    while i < len(argv) and argv[i] in ('-H', '-L', '-P'):
+        follow = argv[i] == '-L'
+        i += 1
     while i < len(argv):
-        if argv[i].startswith('-'):
+        # Paths end at the first option, test or operator
+        if argv[i].startswith('-') or argv[i] in ('!', '(', ')', ','):
             break
         paths.append(argv[i])
         i += 1
@@ -292,9 +659,10 @@ def main():
         paths = ['.']
     expr_args = argv[i:]
     expr, _ = parse_expr(expr_args)
-    # Actions are set by parse_expr, but only last one is used
+    expr = reorder(expr)
+    # The parser treats actions as always true; the last one given is used
     actions = [action_print]
-    for j, arg in enumerate(expr_args):
+    for arg in expr_args:
         if arg == '-print':
             actions = [action_print]
         elif arg == '-print0':
@@ -310,7 +678,15 @@ def main():
     if '-maxdepth' in expr_args:
         idx = expr_args.index('-maxdepth')
         maxdepth = int(expr_args[idx+1])
-    walk(paths, expr, actions, mindepth, maxdepth)
+    # Scan directories on a thread pool; output order is then unspecified
+    threads = 1
+    if '--threads' in expr_args:
+        idx = expr_args.index('--threads')
+        threads = int(expr_args[idx+1])
+    if '-follow' in expr_args:
+        follow = True
+    with STDOUT:
+        walk(paths, expr, actions, mindepth, maxdepth, threads, follow)
 
 if __name__ == '__main__':
     main()